@@ -1,6 +1,42 @@
 # Import the required modules
+from concurrent.futures import ThreadPoolExecutor
+
 from vtk import *
 
+from smp_backend import initialize_smp_backend
+
+# Pressure range of the data, which the transfer functions span
+PRESSURE_MIN = -4931.54
+PRESSURE_MAX = 2594.97
+# Largest scalar of the unsigned short volume the pressure is quantized to
+QUANTIZED_MAX = 65535.0
+
+# Transfer function control points as (pressure, r, g, b) and (pressure, opacity)
+COLOR_POINTS = [
+    (PRESSURE_MIN, 0.0, 1.0, 1.0),
+    (-2508.95, 0.0, 0.0, 1.0),
+    (-1873.9, 0.0, 0.0, 0.5),
+    (-1027.16, 1.0, 0.0, 0.0),
+    (-298.031, 1.0, 0.4, 0.0),
+    (PRESSURE_MAX, 1.0, 1.0, 0.0),
+]
+OPACITY_POINTS = [
+    (PRESSURE_MIN, 1.0),
+    (101.815, 0.002),
+    (PRESSURE_MAX, 0.0),
+]
+
+
+def to_quantized(pressure):
+    """
+    Map a pressure value onto the scalar range of the quantized volume.
+    Args:
+        pressure (float): Pressure value.
+    Returns:
+        float: Corresponding unsigned short scalar value.
+    """
+    return (pressure - PRESSURE_MIN) * QUANTIZED_MAX / (PRESSURE_MAX - PRESSURE_MIN)
+
 
 def prompt_user_for_phong_shading():
     """
@@ -27,30 +63,44 @@ def create_reader(file_name):
     reader = vtkXMLImageDataReader()
     reader.SetFileName(file_name)
     reader.Update()
-    return reader.GetOutput()
+    return reader
+
+
+def create_quantizer(reader):
+    """
+    Rescale the pressure to unsigned short so the volume uploaded to the
+    mapper is a quarter of the size of the double precision input.
+    Args:
+        reader (vtkXMLImageDataReader): Reader providing the input data.
+    Returns:
+        vtkImageShiftScale: Filter producing the quantized volume.
+    """
+    quantizer = vtkImageShiftScale()
+    quantizer.SetInputConnection(reader.GetOutputPort())
+    quantizer.SetShift(-PRESSURE_MIN)
+    quantizer.SetScale(QUANTIZED_MAX / (PRESSURE_MAX - PRESSURE_MIN))
+    quantizer.SetOutputScalarTypeToUnsignedShort()
+    quantizer.ClampOverflowOn()
+    quantizer.Update()
+    return quantizer
 
 
 def create_transfer_functions():
     """
-    Create color and opacity transfer functions.
+    Create color and opacity transfer functions over the quantized volume.
     Returns:
         vtkColorTransferFunction: Color transfer function.
         vtkPiecewiseFunction: Opacity transfer function.
     """
     # Color transfer function
     color_function = vtkColorTransferFunction()
-    color_function.AddRGBPoint(-4931.54, 0.0, 1.0, 1.0)
-    color_function.AddRGBPoint(-2508.95, 0.0, 0.0, 1.0)
-    color_function.AddRGBPoint(-1873.9, 0.0, 0.0, 0.5)
-    color_function.AddRGBPoint(-1027.16, 1.0, 0.0, 0.0)
-    color_function.AddRGBPoint(-298.031, 1.0, 0.4, 0.0)
-    color_function.AddRGBPoint(2594.97, 1.0, 1.0, 0.0)
+    for pressure, r, g, b in COLOR_POINTS:
+        color_function.AddRGBPoint(to_quantized(pressure), r, g, b)
 
     # Opacity transfer function
     opacity_function = vtkPiecewiseFunction()
-    opacity_function.AddPoint(-4931.54, 1.0)
-    opacity_function.AddPoint(101.815, 0.002)
-    opacity_function.AddPoint(2594.97, 0.0)
+    for pressure, opacity in OPACITY_POINTS:
+        opacity_function.AddPoint(to_quantized(pressure), opacity)
 
     return color_function, opacity_function
 
@@ -94,16 +144,16 @@ def create_volume_actor(volume_mapper, volume_property):
     return volume_actor
 
 
-def create_outline_actor(data):
+def create_outline_actor(reader):
     """
     Create outline actor.
     Args:
-        data (vtkImageData): Input data object.
+        reader (vtkXMLImageDataReader): Reader providing the input data.
     Returns:
         vtkActor: Outline actor object.
     """
     outline_filter = vtkOutlineFilter()
-    outline_filter.SetInputData(data)
+    outline_filter.SetInputConnection(reader.GetOutputPort())
 
     outline_mapper = vtkPolyDataMapper()
     outline_mapper.SetInputConnection(outline_filter.GetOutputPort())
@@ -148,16 +198,21 @@ def main():
     Main function to execute the volume rendering.
 
     """
+    initialize_smp_backend()
     file_name = 'Data/Isabel_3D.vti'
-    phong_shading = prompt_user_for_phong_shading()
-    data = create_reader(file_name)
+    # Read the data in the background while the user answers the prompt
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        reader_future = executor.submit(create_reader, file_name)
+        phong_shading = prompt_user_for_phong_shading()
+        reader = reader_future.result()
     color_function, opacity_function = create_transfer_functions()
     volume_property = create_volume_property(
         color_function, opacity_function, phong_shading)
+    quantizer = create_quantizer(reader)
     volume_mapper = vtkSmartVolumeMapper()
-    volume_mapper.SetInputData(data)
+    volume_mapper.SetInputConnection(quantizer.GetOutputPort())
     volume_actor = create_volume_actor(volume_mapper, volume_property)
-    outline_actor = create_outline_actor(data)
+    outline_actor = create_outline_actor(reader)
     setup_renderer(volume_actor, outline_actor)
 
 
@@ -0,0 +1,16 @@
+# Shared VTK SMP setup for the assignment scripts
+import os
+
+from vtk import vtkSMPTools
+
+
+def initialize_smp_backend():
+    """
+    Run VTK's SMP-aware filters on all CPU cores.
+    A backend chosen through VTK_SMP_BACKEND_IN_USE (e.g. TBB or OpenMP) is
+    kept; only the default Sequential backend is switched to STDThread.
+    """
+    if vtkSMPTools.GetBackend() == 'Sequential' and \
+            'VTK_SMP_BACKEND_IN_USE' not in os.environ:
+        vtkSMPTools.SetBackend('STDThread')
+    vtkSMPTools.Initialize(os.cpu_count())
@@ -1,14 +1,111 @@
+import argparse
+import math
+from concurrent.futures import ThreadPoolExecutor
+
 import vtk
 import numpy as np
+from vtk.util.numpy_support import numpy_to_vtk, numpy_to_vtkIdTypeArray, vtk_to_numpy
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # Without Numba the kernels below still run, just as plain Python
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+
+def make_integrator(origin, spacing, dims):
+    """
+    Build a compiled RK4 streamline integrator specialized to one grid geometry.
+
+    The origin, reciprocal spacing and dimensions are baked in as compile-time
+    constants. The (nz, ny, nx, 3) vector grid is still passed in, as Numba
+    would otherwise freeze the whole array into the compiled code.
+    Interpolation and the RK4 step are inner functions that Numba inlines, so
+    each step runs as one fused kernel that keeps k1..k4 in scalars.
+
+    Args:
+        origin (Tuple[float, float, float]): Origin of the grid.
+        spacing (Tuple[float, float, float]): Spacing of the grid.
+        dims (Tuple[int, int, int]): Number of points along x, y and z.
+
+    Returns:
+        Callable: integrate(grid, seed, step_size, max_steps, out) tracing
+        max_steps RK4 steps from seed and writing the i-th point to out[i].
+    """
+    ox, oy, oz = (float(v) for v in origin)
+    inv_sx, inv_sy, inv_sz = (1.0 / float(v) for v in spacing)
+    nx, ny, nz = (int(v) for v in dims)
+
+    @njit(cache=True, fastmath=True)
+    def _integrate(grid, seed, step_size, max_steps, out):
+        def _interp(x, y, z):
+            gx = (x - ox) * inv_sx
+            gy = (y - oy) * inv_sy
+            gz = (z - oz) * inv_sz
+            if gx < 0.0 or gy < 0.0 or gz < 0.0 or \
+                    gx > nx - 1 or gy > ny - 1 or gz > nz - 1:
+                return 0.0, 0.0, 0.0
+
+            i = min(int(math.floor(gx)), nx - 2)
+            j = min(int(math.floor(gy)), ny - 2)
+            k = min(int(math.floor(gz)), nz - 2)
+            fx = gx - i
+            fy = gy - j
+            fz = gz - k
+
+            vx = 0.0
+            vy = 0.0
+            vz = 0.0
+            for dk in range(2):
+                wz = fz if dk else 1.0 - fz
+                for dj in range(2):
+                    wy = fy if dj else 1.0 - fy
+                    for di in range(2):
+                        w = (fx if di else 1.0 - fx) * wy * wz
+                        vx += w * grid[k + dk, j + dj, i + di, 0]
+                        vy += w * grid[k + dk, j + dj, i + di, 1]
+                        vz += w * grid[k + dk, j + dj, i + di, 2]
+            return vx, vy, vz
+
+        def _rk4_step(x, y, z, h):
+            k1x, k1y, k1z = _interp(x, y, z)
+            k2x, k2y, k2z = _interp(x + 0.5 * h * k1x,
+                                    y + 0.5 * h * k1y, z + 0.5 * h * k1z)
+            k3x, k3y, k3z = _interp(x + 0.5 * h * k2x,
+                                    y + 0.5 * h * k2y, z + 0.5 * h * k2z)
+            k4x, k4y, k4z = _interp(x + h * k3x, y + h * k3y, z + h * k3z)
+            return (x + h * (k1x + 2 * k2x + 2 * k3x + k4x) / 6,
+                    y + h * (k1y + 2 * k2y + 2 * k3y + k4y) / 6,
+                    z + h * (k1z + 2 * k2z + 2 * k3z + k4z) / 6)
+
+        x, y, z = seed[0], seed[1], seed[2]
+        for n in range(max_steps):
+            x, y, z = _rk4_step(x, y, z, step_size)
+            out[n, 0] = x
+            out[n, 1] = y
+            out[n, 2] = z
+
+    return _integrate
 
 
 class VectorFieldInterpolator:
     """
-    Interpolates the vector field at a given position using VTKProbeFilter.
+    Interpolates the vector field at a given position using trilinear interpolation.
     """
 
     def __init__(self, vector_field):
         self.vector_field = vector_field
+        self.dims = np.array(vector_field.GetDimensions())
+        self.origin = np.array(vector_field.GetOrigin())
+        self.spacing = np.array(vector_field.GetSpacing())
+        nx, ny, nz = self.dims
+        # VTK stores point data with x varying fastest, hence the (z, y, x) order
+        self.grid = vtk_to_numpy(vector_field.GetPointData().GetVectors()).reshape(
+            nz, ny, nx, 3)
 
     def interpolate(self, position):
         """
@@ -18,29 +115,51 @@ class VectorFieldInterpolator:
             position (np.ndarray): The 3D position to interpolate at.
 
         Returns:
-            np.ndarray: The interpolated vector at the specified position.
+            np.ndarray: The interpolated vector at the specified position, or a
+            zero vector if the position is outside the data bounds.
+        """
+        grid_position = (np.asarray(position, dtype=float) -
+                         self.origin) / self.spacing
+        if np.any(grid_position < 0) or np.any(grid_position > self.dims - 1):
+            return np.zeros(3)
+
+        # Clamp the lower corner so points on the upper boundary use the last cell
+        i, j, k = np.minimum(np.floor(grid_position).astype(int), self.dims - 2)
+        fx, fy, fz = grid_position - (i, j, k)
 
-        Raises:
-            ValueError: If the position is outside the data bounds.
+        corners = self.grid[k:k + 2, j:j + 2, i:i + 2]
+        corners = corners[0] * (1 - fz) + corners[1] * fz
+        corners = corners[0] * (1 - fy) + corners[1] * fy
+        return corners[0] * (1 - fx) + corners[1] * fx
+
+    def interpolate_many(self, positions):
         """
-        point = vtk.vtkPoints()
-        point.SetNumberOfPoints(1)
-        point.SetPoint(0, position[0], position[1], position[2])
+        Interpolates the vector field at many positions in one vectorized pass.
 
-        polydata = vtk.vtkPolyData()
-        polydata.SetPoints(point)
+        Args:
+            positions (np.ndarray): (N, 3) array of positions to interpolate at.
+
+        Returns:
+            np.ndarray: (N, 3) array of interpolated vectors, with zero vectors
+            for positions outside the data bounds.
+        """
+        grid_positions = (np.asarray(positions, dtype=float) -
+                          self.origin) / self.spacing
+        inside = np.all((grid_positions >= 0) &
+                        (grid_positions <= self.dims - 1), axis=1)
 
-        probe_filter = vtk.vtkProbeFilter()
-        probe_filter.SetInputData(polydata)
-        probe_filter.SetSourceData(self.vector_field)
-        probe_filter.Update()
+        lower = np.clip(np.floor(grid_positions).astype(int), 0, self.dims - 2)
+        fx, fy, fz = (grid_positions - lower).T
+        i, j, k = lower.T
 
-        # Attempt to get the vector at the specified point
-        if probe_filter.GetOutput().GetPointData().GetVectors() is not None:
-            return probe_filter.GetOutput().GetPointData().GetVectors().GetTuple3(0)
-        else:
-            raise ValueError(
-                "The specified position is outside the data bounds.")
+        vectors = np.zeros((len(grid_positions), 3))
+        for dk, wz in ((0, 1 - fz), (1, fz)):
+            for dj, wy in ((0, 1 - fy), (1, fy)):
+                for di, wx in ((0, 1 - fx), (1, fx)):
+                    vectors += (wx * wy * wz)[:, None] * \
+                        self.grid[k + dk, j + dj, i + di]
+        vectors[~inside] = 0
+        return vectors
 
 
 class RK4Integrator:
@@ -48,8 +167,11 @@ class RK4Integrator:
     Performs RK4 integration using a vector field.
     """
 
-    def __init__(self, vector_field):
+    def __init__(self, vector_field, interpolator=None):
         self.vector_field = vector_field
+        # Share an existing interpolator rather than re-wrapping the field
+        self.interp = interpolator if interpolator is not None else \
+            VectorFieldInterpolator(vector_field)
 
     def step(self, x, y, z, step_size):
         """
@@ -65,21 +187,21 @@ class RK4Integrator:
             Tuple[float, float, float]: The new position after RK4 integration.
         """
         def get_vector(xi, yi, zi):
-            interpolator = VectorFieldInterpolator(self.vector_field)
-            vector = interpolator.interpolate(np.array([xi, yi, zi]))
-            # Return a zero vector if out of bounds
-            return np.array(vector) if vector is not None else np.array([0, 0, 0])
+            # Plain floats keep the RK4 arithmetic below free of NumPy temporaries
+            return self.interp.interpolate((xi, yi, zi)).tolist()
 
-        k1 = get_vector(x, y, z)
-        k2 = get_vector(x + 0.5 * step_size *
-                        k1[0], y + 0.5 * step_size * k1[1], z + 0.5 * step_size * k1[2])
-        k3 = get_vector(x + 0.5 * step_size *
-                        k2[0], y + 0.5 * step_size * k2[1], z + 0.5 * step_size * k2[2])
-        k4 = get_vector(x + step_size * k3[0], y +
-                        step_size * k3[1], z + step_size * k3[2])
+        h = step_size
+        k1x, k1y, k1z = get_vector(x, y, z)
+        k2x, k2y, k2z = get_vector(
+            x + 0.5 * h * k1x, y + 0.5 * h * k1y, z + 0.5 * h * k1z)
+        k3x, k3y, k3z = get_vector(
+            x + 0.5 * h * k2x, y + 0.5 * h * k2y, z + 0.5 * h * k2z)
+        k4x, k4y, k4z = get_vector(x + h * k3x, y + h * k3y, z + h * k3z)
 
-        delta = (k1 + 2 * k2 + 2 * k3 + k4) / 6
-        return x + step_size * delta[0], y + step_size * delta[1], z + step_size * delta[2]
+        dx = (k1x + 2 * k2x + 2 * k3x + k4x) / 6
+        dy = (k1y + 2 * k2y + 2 * k3y + k4y) / 6
+        dz = (k1z + 2 * k2z + 2 * k3z + k4z) / 6
+        return x + h * dx, y + h * dy, z + h * dz
 
 
 class StreamlineGenerator:
@@ -89,6 +211,10 @@ class StreamlineGenerator:
 
     def __init__(self, vector_field):
         self.vector_field = vector_field
+        self.interpolator = VectorFieldInterpolator(vector_field)
+        self.integrator = RK4Integrator(vector_field, self.interpolator)
+        self.integrate = make_integrator(
+            self.interpolator.origin, self.interpolator.spacing, self.interpolator.dims)
 
     def generate(self, seed, step_size, max_steps):
         """
@@ -100,25 +226,128 @@ class StreamlineGenerator:
             max_steps (int): The maximum number of integration steps.
 
         Returns:
-            List[Tuple[float, float, float]]: List of points comprising the streamline.
+            np.ndarray: (2 * max_steps + 1, 3) float32 array of points comprising
+            the streamline, ordered from the backward end to the forward end.
         """
-        integrator = RK4Integrator(self.vector_field)
-        x, y, z = seed
-        streamline_points = [seed]
+        seed = np.array(seed, dtype=np.float64)
+        streamline_points = np.empty((2 * max_steps + 1, 3), dtype=np.float32)
+        streamline_points[max_steps] = seed
+
+        if NUMBA_AVAILABLE:
+            self._generate_compiled(seed, step_size, max_steps, streamline_points)
+            return streamline_points
 
         # Forward integration
-        for _ in range(max_steps):
-            x, y, z = integrator.step(x, y, z, step_size)
-            streamline_points.append((x, y, z))
+        x, y, z = seed
+        for i in range(max_steps):
+            x, y, z = self.integrator.step(x, y, z, step_size)
+            streamline_points[max_steps + 1 + i] = (x, y, z)
 
-        # Backward integration
+        # Backward integration, filled in from the seed towards index 0
         x, y, z = seed
-        for _ in range(max_steps):
-            x, y, z = integrator.step(x, y, z, -step_size)
-            streamline_points.insert(0, (x, y, z))
+        for i in range(max_steps):
+            x, y, z = self.integrator.step(x, y, z, -step_size)
+            streamline_points[max_steps - 1 - i] = (x, y, z)
 
         return streamline_points
 
+    def generate_many(self, seeds, step_size, max_steps):
+        """
+        Generate streamlines for many seeds at once using RK4 integration.
+
+        Without Numba all seeds advance together, so each RK4 stage costs a
+        single vectorized interpolation instead of one per seed.
+
+        Args:
+            seeds (np.ndarray): (N, 3) array of starting seed points.
+            step_size (float): The step size for integration.
+            max_steps (int): The maximum number of integration steps.
+
+        Returns:
+            np.ndarray: (N, 2 * max_steps + 1, 3) float32 array holding one streamline
+            per seed, each ordered as returned by generate().
+        """
+        seeds = np.array(seeds, dtype=np.float64).reshape(-1, 3)
+        streamlines = np.empty((len(seeds), 2 * max_steps + 1, 3), dtype=np.float32)
+        streamlines[:, max_steps] = seeds
+
+        if NUMBA_AVAILABLE:
+            for seed, streamline_points in zip(seeds, streamlines):
+                self._generate_compiled(
+                    seed, step_size, max_steps, streamline_points)
+            return streamlines
+
+        interpolator = self.interpolator
+        for direction in (1, -1):
+            h = direction * step_size
+            positions = seeds
+            for i in range(max_steps):
+                k1 = interpolator.interpolate_many(positions)
+                k2 = interpolator.interpolate_many(positions + 0.5 * h * k1)
+                k3 = interpolator.interpolate_many(positions + 0.5 * h * k2)
+                k4 = interpolator.interpolate_many(positions + h * k3)
+                positions = positions + h * (k1 + 2 * k2 + 2 * k3 + k4) / 6
+                streamlines[:, max_steps + direction * (i + 1)] = positions
+
+        return streamlines
+
+    def _generate_compiled(self, seed, step_size, max_steps, streamline_points):
+        """
+        Fill streamline_points with the Numba-compiled RK4 kernel.
+        """
+        grid = self.interpolator.grid
+
+        # Forward points fill the upper half; backward points fill the lower
+        # half through a reversed view, so the buffer is already in order
+        self.integrate(grid, seed, step_size, max_steps,
+                       streamline_points[max_steps + 1:])
+        self.integrate(grid, seed, -step_size, max_steps,
+                       streamline_points[max_steps - 1::-1])
+
+
+class StreamTracerGenerator:
+    """
+    Generates a streamline with VTK's compiled vtkStreamTracer.
+
+    Unlike StreamlineGenerator, the step size is measured along the streamline
+    and integration stops where the streamline leaves the data bounds.
+    """
+
+    def __init__(self, vector_field):
+        self.vector_field = vector_field
+
+    def generate(self, seed, step_size, max_steps):
+        """
+        Generate a streamline using RK4 integration in both directions.
+
+        Args:
+            seed (Tuple[float, float, float]): The starting seed point.
+            step_size (float): The step size for integration.
+            max_steps (int): The maximum number of integration steps per direction.
+
+        Returns:
+            vtkPolyData: The forward and backward halves of the streamline as polylines.
+        """
+        seed_points = vtk.vtkPoints()
+        seed_points.InsertNextPoint(seed)
+        seeds = vtk.vtkPolyData()
+        seeds.SetPoints(seed_points)
+
+        # Cap the length at the distance the fixed-step integrator could cover
+        max_speed = self.vector_field.GetPointData().GetVectors().GetMaxNorm()
+
+        stream_tracer = vtk.vtkStreamTracer()
+        stream_tracer.SetInputData(self.vector_field)
+        stream_tracer.SetSourceData(seeds)
+        stream_tracer.SetIntegratorTypeToRungeKutta4()
+        stream_tracer.SetIntegrationStepUnit(vtk.vtkStreamTracer.LENGTH_UNIT)
+        stream_tracer.SetInitialIntegrationStep(step_size)
+        stream_tracer.SetMaximumNumberOfSteps(max_steps)
+        stream_tracer.SetMaximumPropagation(max_steps * step_size * max_speed)
+        stream_tracer.SetIntegrationDirectionToBoth()
+        stream_tracer.Update()
+        return stream_tracer.GetOutput()
+
 
 class StreamlineWriter:
     """
@@ -130,54 +359,92 @@ class StreamlineWriter:
         Write the streamline to a VTKPolyData file.
 
         Args:
-            streamline_points (List[Tuple[float, float, float]]): List of points comprising the streamline.
+            streamline_points (np.ndarray): (N, 3) array of points comprising the streamline.
             filename (str): The output filename.
         """
+        # Hand the whole point buffer to VTK instead of inserting point by point
+        streamline_points = np.ascontiguousarray(streamline_points, dtype=np.float32)
         points = vtk.vtkPoints()
-        lines = vtk.vtkCellArray()
+        points.SetData(numpy_to_vtk(streamline_points, deep=False))
 
-        for i, point in enumerate(streamline_points):
-            points.InsertPoint(i, point)
-        for i in range(len(streamline_points) - 1):
-            line = vtk.vtkLine()
-            line.GetPointIds().SetId(0, i)
-            line.GetPointIds().SetId(1, i + 1)
-            lines.InsertNextCell(line)
+        # The streamline is a single polyline cell through every point in order
+        num_points = len(streamline_points)
+        offsets = np.array([0, num_points], dtype=np.int64)
+        connectivity = np.arange(num_points, dtype=np.int64)
+        lines = vtk.vtkCellArray()
+        lines.SetData(numpy_to_vtkIdTypeArray(offsets, deep=True),
+                      numpy_to_vtkIdTypeArray(connectivity, deep=True))
 
         polydata = vtk.vtkPolyData()
         polydata.SetPoints(points)
         polydata.SetLines(lines)
+        self.write_polydata(polydata, filename)
+
+    def write_polydata(self, polydata, filename):
+        """
+        Write already assembled streamline polydata to a VTKPolyData file.
 
+        Args:
+            polydata (vtkPolyData): The streamline polydata, e.g. from StreamTracerGenerator.
+            filename (str): The output filename.
+        """
         writer = vtk.vtkXMLPolyDataWriter()
         writer.SetFileName(filename)
         writer.SetInputData(polydata)
         writer.Write()
 
 
-def main():
-    # Load vector field data
+def read_vector_field(filename):
+    """
+    Read the vector field from a VTKImageData file.
+
+    Args:
+        filename (str): The input filename.
+
+    Returns:
+        vtkImageData: The vector field.
+    """
     reader = vtk.vtkXMLImageDataReader()
-    reader.SetFileName("tornado3d_vector.vti")
+    reader.SetFileName(filename)
     reader.Update()
-    vector_field = reader.GetOutput()
+    return reader.GetOutput()
+
 
-    # Get the seed location from the user
-    seed_x = float(input("Seed X coordinate: "))
-    seed_y = float(input("Seed Y coordinate: "))
-    seed_z = float(input("Seed Z coordinate: "))
-    seed = (seed_x, seed_y, seed_z)
+def main():
+    parser = argparse.ArgumentParser(
+        description="Trace a streamline through the tornado vector field.")
+    parser.add_argument(
+        "--vtk-tracer", action="store_true",
+        help="use VTK's vtkStreamTracer, which steps by arc length and stops at "
+             "the data bounds, instead of the fixed-step RK4 integrator")
+    args = parser.parse_args()
+
+    # Load the vector field in the background while the user enters the seed
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        reader_future = executor.submit(read_vector_field, "tornado3d_vector.vti")
+
+        # Get the seed location from the user
+        seed_x = float(input("Seed X coordinate: "))
+        seed_y = float(input("Seed Y coordinate: "))
+        seed_z = float(input("Seed Z coordinate: "))
+        seed = (seed_x, seed_y, seed_z)
+
+        vector_field = reader_future.result()
 
     # Define parameters
     step_size = 0.05
     max_steps = 1000
 
-    # Generate streamline
-    generator = StreamlineGenerator(vector_field)
-    streamline_points = generator.generate(seed, step_size, max_steps)
-
-    # Write the streamline to a VTKPolyData file
+    # Generate the streamline and write it to a VTKPolyData file
     writer = StreamlineWriter()
-    writer.write(streamline_points, "tornado.vtp")
+    if args.vtk_tracer:
+        generator = StreamTracerGenerator(vector_field)
+        writer.write_polydata(
+            generator.generate(seed, step_size, max_steps), "tornado.vtp")
+    else:
+        generator = StreamlineGenerator(vector_field)
+        streamline_points = generator.generate(seed, step_size, max_steps)
+        writer.write(streamline_points, "tornado.vtp")
 
 
 if __name__ == "__main__":